@@ -0,0 +1,17 @@
+"""
+Shared project paths, resolved once at import.
+
+Every pipeline script used to rebuild the same directory paths (and pay
+the associated getcwd syscalls) in its preamble. Importing them from here
+computes them a single time per process, and the project root can be
+redirected through the SYNTHETIC_DATA_DIR environment variable.
+"""
+import os
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = Path(os.environ.get("SYNTHETIC_DATA_DIR", SCRIPT_DIR.parent))
+
+RAW_DIR = PROJECT_DIR / "data" / "raw"
+PROCESSED_DIR = PROJECT_DIR / "data" / "processed"
+OUTPUTS_DIR = PROJECT_DIR / "outputs"
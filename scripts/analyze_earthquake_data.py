@@ -1,9 +1,56 @@
 import os
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # headless backend; skips interactive setup per figure
 import matplotlib.pyplot as plt
 from datetime import datetime
 import math
+from fast_histogram import histogram1d
+from numba import njit
+import pyarrow as pa
+import pyarrow.parquet as pq
+from _paths import PROCESSED_DIR, OUTPUTS_DIR, RAW_DIR
+
+# Shared plot style, set once at import instead of per figure.
+# path.simplify collapses dense vector paths before encoding; see also
+# rasterized=True on the scatter calls, which keeps big point clouds out of
+# the vector layer
+plt.rcParams.update({
+    'figure.dpi': 100,
+    'savefig.dpi': 300,
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+})
+
+@njit(cache=True, fastmath=True)
+def estimate_b_values(mags_sorted, m_mins):
+    """
+    Maximum-likelihood Gutenberg-Richter b-values for a batch of minimum
+    magnitudes, from one pass over the sorted catalog.
+
+    Walks the sorted magnitudes right-to-left, accumulating the running sum
+    and count, so each m_min reuses the work done for the larger ones
+    (O(N + K) total instead of K full-array scans). Returns (b, sigma)
+    arrays, NaN where fewer than 2 events exceed the cutoff.
+    """
+    starts = np.searchsorted(mags_sorted, m_mins)
+    b = np.full(m_mins.size, np.nan)
+    sigma = np.full(m_mins.size, np.nan)
+
+    total = 0.0
+    count = 0
+    pos = mags_sorted.size
+    for k in range(m_mins.size - 1, -1, -1):
+        while pos > starts[k]:
+            pos -= 1
+            total += mags_sorted[pos]
+            count += 1
+        if count >= 2:
+            mean_mag = total / count
+            b[k] = np.log10(np.e) / (mean_mag - m_mins[k])
+            sigma[k] = 2.3 * b[k] / np.sqrt(count)
+    return b, sigma
 
 def analyze_earthquake_catalog():
     """
@@ -15,19 +62,16 @@ def analyze_earthquake_catalog():
     """
     print("Analyzing earthquake catalog data...")
     
-    # Get paths
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_dir = os.path.dirname(script_dir)
-    processed_data_path = os.path.join(project_dir, "data", "processed")
-    outputs_path = os.path.join(project_dir, "outputs")
+    # Project directories come from _paths, resolved once at import
     
     # Ensure directories exist
-    os.makedirs(processed_data_path, exist_ok=True)
-    os.makedirs(outputs_path, exist_ok=True)
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
+    os.makedirs(OUTPUTS_DIR, exist_ok=True)
     
-    # Load earthquake data
-    earthquake_file = os.path.join(processed_data_path, "processed_earthquakes.csv")
-    eq_data = pd.read_csv(earthquake_file)
+    # Load earthquake data (Parquet keeps the datetime columns typed, so no
+    # string re-parsing is needed here)
+    earthquake_file = os.path.join(PROCESSED_DIR, "processed_earthquakes.parquet")
+    eq_data = pd.read_parquet(earthquake_file)
     
     print(f"Loaded {len(eq_data)} earthquakes from {earthquake_file}")
     
@@ -37,188 +81,205 @@ def analyze_earthquake_catalog():
     print(f"Magnitude range: {eq_data['magnitude'].min():.1f} to {eq_data['magnitude'].max():.1f}")
     print(f"Depth range: {eq_data['depth_km'].min():.1f} to {eq_data['depth_km'].max():.1f} km")
     
-    # Convert time to datetime for time-based analysis
-    eq_data['datetime'] = pd.to_datetime(eq_data['time'])
-    eq_data['year'] = eq_data['datetime'].dt.year
-    
-    # Count earthquakes by year
-    yearly_counts = eq_data.groupby('year').size()
+    # 'datetime' and 'year' arrive already typed from the Parquet file
+
+    # Count earthquakes by year (a plain np.unique value count; the GroupBy
+    # machinery is overkill for one integer key)
+    years_unique, year_counts = np.unique(eq_data['year'].to_numpy(), return_counts=True)
     print("\n=== Yearly Earthquake Counts ===")
-    print(yearly_counts)
-    
-    # Filter to include only M3.0+ events for analysis
-    m3plus_data = eq_data[eq_data['magnitude'] >= 3.0]
-    print(f"\nFound {len(m3plus_data)} events with magnitude >= 3.0")
+    for year, count in zip(years_unique, year_counts):
+        print(f"{year}: {count}")
     
-    # Count by magnitude bins
-    mag_bins = [3.0, 3.5, 4.0, 4.5, 5.0, 5.5, 6.0, 6.5, 7.0]
-    m3plus_data['mag_bin'] = pd.cut(m3plus_data['magnitude'], mag_bins)
-    mag_counts = m3plus_data.groupby('mag_bin').size()
+    # Filter to include only M3.0+ events for analysis. The selection is
+    # kept as a boolean mask plus flat numpy arrays; writing into a sliced
+    # DataFrame would silently materialize a full copy, so the copy is made
+    # exactly once, right before the CSV save at the end.
+    m3plus_mask = eq_data['magnitude'].to_numpy() >= 3.0
+    m3_mag = eq_data['magnitude'].to_numpy()[m3plus_mask]
+    m3_lon = eq_data['longitude'].to_numpy()[m3plus_mask]
+    m3_lat = eq_data['latitude'].to_numpy()[m3plus_mask]
+    m3_depth = eq_data['depth_km'].to_numpy()[m3plus_mask]
+    m3_datetime = eq_data['datetime'].to_numpy()[m3plus_mask]
+    # Month buckets as datetime64[M] integers, computed once and reused by
+    # the plots below (Period conversion is per-element Python)
+    m3_months = m3_datetime.astype('datetime64[M]')
+    print(f"\nFound {m3plus_mask.sum()} events with magnitude >= 3.0")
+
+    # Count by magnitude bins (searchsorted + bincount is a single C-level
+    # scan; side='left' keeps the right-closed bins pd.cut used)
+    mag_bins = np.array([3.0, 3.5, 4.0, 4.5, 5.0, 5.5, 6.0, 6.5, 7.0])
+    bin_idx = np.searchsorted(mag_bins, m3_mag, side='left') - 1
+    in_range = (bin_idx >= 0) & (bin_idx < len(mag_bins) - 1)
+    mag_counts = np.bincount(bin_idx[in_range], minlength=len(mag_bins) - 1)
     print("\n=== Magnitude Distribution ===")
-    print(mag_counts)
-    
-    # Estimate b-value using maximum likelihood method
-    # b-value is an important parameter in Gutenberg-Richter relation
-    def estimate_b_value(magnitudes, m_min):
-        # Filter magnitudes above or equal to m_min
-        mags = magnitudes[magnitudes >= m_min]
-        if len(mags) < 2:
-            return None, None
-        
-        # Maximum likelihood estimate of b-value
-        mean_mag = np.mean(mags)
-        b_value = np.log10(np.e) / (mean_mag - m_min)
-        
-        # Uncertainty in b-value
-        uncertainty = 2.3 * b_value / np.sqrt(len(mags))
-        
-        return b_value, uncertainty
+    for lo, hi, count in zip(mag_bins[:-1], mag_bins[1:], mag_counts):
+        print(f"({lo}, {hi}]: {count}")
     
-    # Calculate b-value for different minimum magnitudes
+    # Estimate b-values (an important parameter in the Gutenberg-Richter
+    # relation) for different minimum magnitudes; the whole sweep is one
+    # call into the jitted maximum-likelihood kernel above
     print("\n=== Gutenberg-Richter b-value Estimates ===")
-    for m_min in [3.0, 3.5, 4.0, 4.5]:
-        b_val, uncertainty = estimate_b_value(m3plus_data['magnitude'].values, m_min)
-        if b_val:
+    m_mins = np.array([3.0, 3.5, 4.0, 4.5])
+    b_vals, b_sigmas = estimate_b_values(np.sort(m3_mag), m_mins)
+    for m_min, b_val, uncertainty in zip(m_mins, b_vals, b_sigmas):
+        if not np.isnan(b_val):
             print(f"For M >= {m_min}: b-value = {b_val:.2f} +/- {uncertainty:.2f}")
     
     # Check for catalog completeness by plotting cumulative frequency vs magnitude
-    def plot_magnitude_completeness():
-        plt.figure(figsize=(10, 6))
-        
-        # Create logarithmic bins for magnitude
-        min_mag = np.floor(m3plus_data['magnitude'].min())
-        max_mag = np.ceil(m3plus_data['magnitude'].max())
-        mag_bins = np.arange(min_mag, max_mag + 0.1, 0.1)
-        
-        # Count earthquakes in each bin
-        hist, bin_edges = np.histogram(m3plus_data['magnitude'], bins=mag_bins)
+    def plot_magnitude_completeness(fig, ax):
+        ax.clear()
+        fig.set_size_inches(10, 6)
+
+        # Create uniform 0.1-magnitude bins
+        min_mag = np.floor(m3_mag.min())
+        max_mag = np.ceil(m3_mag.max())
+        n_bins = int(round((max_mag - min_mag) / 0.1))
+
+        # Count earthquakes in each bin (fast_histogram's uniform-bin path
+        # is pure C and much faster than the generic np.histogram). Unlike
+        # np.histogram, every fast_histogram bin is half-open, so nudge the
+        # top of the range up one ulp to keep an event sitting exactly on
+        # max_mag in the last bin instead of silently dropping it
+        hist = histogram1d(m3_mag, bins=n_bins,
+                           range=(min_mag, np.nextafter(max_mag, np.inf)))
+        bin_edges = np.linspace(min_mag, max_mag, n_bins + 1)
         
         # Calculate cumulative counts (reversed)
         cumulative_counts = np.cumsum(hist[::-1])[::-1]
         
         # Plot cumulative counts vs magnitude (log scale)
-        plt.semilogy(bin_edges[:-1], cumulative_counts, 'bo-', linewidth=1.5)
-        plt.grid(True, which="both", ls="-", alpha=0.2)
-        plt.xlabel('Magnitude', fontsize=12)
-        plt.ylabel('Cumulative Number', fontsize=12)
-        plt.title('Gutenberg-Richter Relation for Marmara Region', fontsize=14)
-        
+        ax.semilogy(bin_edges[:-1], cumulative_counts, 'bo-', linewidth=1.5)
+        ax.grid(True, which="both", ls="-", alpha=0.2)
+        ax.set_xlabel('Magnitude', fontsize=12)
+        ax.set_ylabel('Cumulative Number', fontsize=12)
+        ax.set_title('Gutenberg-Richter Relation for Marmara Region', fontsize=14)
+
         # Estimate Mc (magnitude of completeness) as point where curve deviates from log-linear
         # This is a simplified approach - actual method would use more sophisticated techniques
-        plt.axvline(x=3.5, color='r', linestyle='--', label='Estimated Mc = 3.5')
-        plt.legend()
-        
+        ax.axvline(x=3.5, color='r', linestyle='--', label='Estimated Mc = 3.5')
+        ax.legend()
+
         # Save the plot
-        plot_file = os.path.join(outputs_path, "magnitude_completeness.png")
-        plt.savefig(plot_file, dpi=300)
-        plt.close()
+        plot_file = os.path.join(OUTPUTS_DIR, "magnitude_completeness.png")
+        fig.savefig(plot_file)
         print(f"Magnitude completeness plot saved to {plot_file}")
     
     # Plot spatial distribution of earthquakes
-    def plot_spatial_distribution():
-        plt.figure(figsize=(12, 8))
-        
+    def plot_spatial_distribution(fig, ax):
+        ax.clear()
+        fig.set_size_inches(12, 8)
+
         # Plot earthquakes with size proportional to magnitude
-        magnitudes = m3plus_data['magnitude'].values
-        sizes = [(m**2) * 5 for m in magnitudes]  # Scale for visibility
-        sc = plt.scatter(m3plus_data['longitude'], m3plus_data['latitude'], s=sizes, 
-                         c=m3plus_data['depth_km'], cmap='viridis_r', alpha=0.6)
-        
-        # Add colorbar for depth
-        cbar = plt.colorbar(sc)
+        sizes = m3_mag * m3_mag * 5.0  # Scale for visibility
+        sc = ax.scatter(m3_lon, m3_lat, s=sizes,
+                        c=m3_depth, cmap='viridis_r', alpha=0.6,
+                        rasterized=True)
+
+        # Add colorbar for depth (removed after saving so it does not leak
+        # into the next plot on the shared figure)
+        cbar = fig.colorbar(sc, ax=ax)
         cbar.set_label('Depth (km)')
         
         # Load fault segments
-        fault_file = os.path.join(project_dir, "data", "raw", "marmara_faults.csv")
+        fault_file = os.path.join(RAW_DIR, "marmara_faults.csv")
         fault_data = pd.read_csv(fault_file)
         
-        # Plot fault segments
+        # Plot fault segments (coordinates are pre-parsed into per-axis
+        # columns by download_fault_data, so each axis is one numeric parse).
+        # Only the first segment of each fault gets a label, so the legend
+        # never builds redundant entries that would be discarded afterwards
+        seen_labels = set()
         for _, fault in fault_data.iterrows():
-            coords = fault['coordinates'].split(';')
-            x_coords = []
-            y_coords = []
-            
-            for coord in coords:
-                lon, lat = coord.split(',')
-                x_coords.append(float(lon))
-                y_coords.append(float(lat))
-            
-            plt.plot(x_coords, y_coords, 'r-', linewidth=2, label=fault['name'] if len(x_coords) > 0 else None)
-        
-        # Remove duplicate labels
-        handles, labels = plt.gca().get_legend_handles_labels()
-        by_label = dict(zip(labels, handles))
-        plt.legend(by_label.values(), by_label.keys(), loc='lower right')
-        
+            x_coords = np.fromstring(fault['lon_coords'], sep=';')
+            y_coords = np.fromstring(fault['lat_coords'], sep=';')
+
+            label = fault['name'] if fault['name'] not in seen_labels else None
+            seen_labels.add(fault['name'])
+            ax.plot(x_coords, y_coords, 'r-', linewidth=2, label=label)
+
+        ax.legend(loc='lower right')
+
         # Set plot limits to Marmara region
-        plt.xlim(26.0, 30.5)
-        plt.ylim(39.5, 41.5)
-        
+        ax.set_xlim(26.0, 30.5)
+        ax.set_ylim(39.5, 41.5)
+
         # Add borders of the Marmara Sea (simplified)
-        plt.axhspan(40.3, 41.1, xmin=0.1, xmax=0.9, alpha=0.1, color='blue', label='Marmara Sea')
-        
-        plt.grid(True, alpha=0.3)
-        plt.xlabel('Longitude (E)')
-        plt.ylabel('Latitude (N)')
-        plt.title('Spatial Distribution of Earthquakes in Marmara Region (2003-2025)')
-        
+        ax.axhspan(40.3, 41.1, xmin=0.1, xmax=0.9, alpha=0.1, color='blue', label='Marmara Sea')
+
+        ax.grid(True, alpha=0.3)
+        ax.set_xlabel('Longitude (E)')
+        ax.set_ylabel('Latitude (N)')
+        ax.set_title('Spatial Distribution of Earthquakes in Marmara Region (2003-2025)')
+
         # Save the plot
-        plot_file = os.path.join(outputs_path, "spatial_distribution.png")
-        plt.savefig(plot_file, dpi=300)
-        plt.close()
+        plot_file = os.path.join(OUTPUTS_DIR, "spatial_distribution.png")
+        fig.savefig(plot_file)
+        cbar.remove()
         print(f"Spatial distribution plot saved to {plot_file}")
     
     # Plot temporal distribution (earthquakes over time)
-    def plot_temporal_distribution():
-        plt.figure(figsize=(12, 6))
-        
-        # Group by year and magnitude bins
-        m3plus_data['year_month'] = m3plus_data['datetime'].dt.to_period('M')
-        monthly_counts = m3plus_data.groupby('year_month').size()
-        
-        # Convert period index to datetime for plotting
-        dates = [pd.to_datetime(str(period)) for period in monthly_counts.index]
-        
-        plt.bar(dates, monthly_counts.values, width=20, alpha=0.7)
-        plt.grid(True, alpha=0.3)
-        plt.xlabel('Date')
-        plt.ylabel('Number of Earthquakes (M >= 3.0)')
-        plt.title('Monthly Earthquake Counts in Marmara Region (2003-2025)')
-        
-        # Add markers for major events (M >= 5.5)
-        major_eq = m3plus_data[m3plus_data['magnitude'] >= 5.5]
-        for _, eq in major_eq.iterrows():
-            plt.axvline(x=eq['datetime'], color='r', linestyle='--', alpha=0.7)
-            plt.text(eq['datetime'], 0.9*max(monthly_counts.values), 
-                     f"M{eq['magnitude']:.1f}", rotation=90, verticalalignment='top')
+    def plot_temporal_distribution(fig, ax):
+        ax.clear()
+        fig.set_size_inches(12, 6)
+
+        # Count events per month; np.unique is a single sorted pass over the
+        # precomputed datetime64[M] buckets
+        unique_months, month_counts = np.unique(m3_months, return_counts=True)
+
+        ax.bar(unique_months.astype('datetime64[D]'), month_counts, width=20, alpha=0.7)
+        ax.grid(True, alpha=0.3)
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Number of Earthquakes (M >= 3.0)')
+        ax.set_title('Monthly Earthquake Counts in Marmara Region (2003-2025)')
         
+        # Add markers for major events (M >= 5.5): one vlines call draws all
+        # the marker lines, and the labels loop only over the pre-extracted
+        # arrays rather than DataFrame rows
+        major_mask = m3_mag >= 5.5
+        major_times = m3_datetime[major_mask]
+        major_mags = m3_mag[major_mask]
+        ymax = month_counts.max()
+
+        ax.vlines(major_times, 0, ymax, colors='r', linestyles='--', alpha=0.7)
+        for event_time, event_mag in zip(major_times, major_mags):
+            ax.text(event_time, 0.9*ymax,
+                    f"M{event_mag:.1f}", rotation=90, verticalalignment='top')
+
         # Save the plot
-        plot_file = os.path.join(outputs_path, "temporal_distribution.png")
-        plt.savefig(plot_file, dpi=300)
-        plt.close()
+        plot_file = os.path.join(OUTPUTS_DIR, "temporal_distribution.png")
+        fig.savefig(plot_file)
         print(f"Temporal distribution plot saved to {plot_file}")
+
+    # Create the plots on one preallocated figure; clearing the axes between
+    # plots avoids tearing down and rebuilding figure machinery each time
+    fig, ax = plt.subplots(figsize=(12, 8))
+    plot_magnitude_completeness(fig, ax)
+    plot_spatial_distribution(fig, ax)
+    plot_temporal_distribution(fig, ax)
+    plt.close(fig)
     
-    # Create the plots
-    plot_magnitude_completeness()
-    plot_spatial_distribution()
-    plot_temporal_distribution()
-    
-    # Create a processed version of the earthquake catalog with additional fields
-    processed_eq = m3plus_data.copy()
+    # Create a processed version of the earthquake catalog with additional
+    # fields (the only place the M3+ subset is materialized as a DataFrame)
+    processed_eq = eq_data.loc[m3plus_mask].copy()
     
-    # Add some derived fields useful for modeling
-    processed_eq['log_energy'] = 1.5 * processed_eq['magnitude'] + 4.8  # Approximate energy release in log10(joules)
+    # Add some derived fields useful for modeling; operate on the raw
+    # ndarray so the assignment skips Series index alignment
+    mag_arr = processed_eq['magnitude'].to_numpy()
+    processed_eq['log_energy'] = 1.5 * mag_arr + 4.8  # Approximate energy release in log10(joules)
     
-    # Save processed data
-    processed_file = os.path.join(processed_data_path, "processed_earthquakes_analyzed.csv")
-    processed_eq.to_csv(processed_file, index=False)
+    # Save processed data (Arrow's parquet writer runs in parallel C and the
+    # columnar file is a fraction of the CSV size)
+    processed_file = os.path.join(PROCESSED_DIR, "processed_earthquakes_analyzed.parquet")
+    pq.write_table(pa.Table.from_pandas(processed_eq, preserve_index=False),
+                   processed_file, compression='zstd')
     print(f"Processed earthquake data saved to {processed_file}")
     
-    # Calculate b-value for future use in synthetic generation
-    b_val, _ = estimate_b_value(m3plus_data['magnitude'].values, 3.5)
-    
+    # b-value for future use in synthetic generation (the M >= 3.5 entry
+    # of the sweep computed above)
+    b_val = b_vals[1]
+
     # Save b-value to a file for use in other scripts
-    b_value_file = os.path.join(processed_data_path, "b_value.txt")
+    b_value_file = os.path.join(PROCESSED_DIR, "b_value.txt")
     with open(b_value_file, 'w') as f:
         f.write(str(b_val))
     print(f"B-value {b_val:.2f} saved to {b_value_file}")
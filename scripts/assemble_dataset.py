@@ -5,6 +5,15 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt # type: ignore
 from datetime import datetime
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from _paths import PROCESSED_DIR, OUTPUTS_DIR
+
+# Collapse dense vector paths before encoding; see also rasterized=True on
+# the scatter calls, which keeps big point clouds out of the vector layer
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
 
 def assemble_dataset():
     """
@@ -17,40 +26,44 @@ def assemble_dataset():
     """
     print("Assembling final earthquake dataset...")
     
-    # Get paths
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_dir = os.path.dirname(script_dir)
-    processed_data_path = os.path.join(project_dir, "data", "processed")
-    outputs_path = os.path.join(project_dir, "outputs")
+    # Project directories come from _paths, resolved once at import
     
     # Ensure output directory exists
-    os.makedirs(outputs_path, exist_ok=True)
+    os.makedirs(OUTPUTS_DIR, exist_ok=True)
     
     # Load datasets
-    real_file = os.path.join(processed_data_path, "processed_earthquakes.csv")
-    bootstrap_file = os.path.join(processed_data_path, "synthetic_bootstrap_v1.csv")
-    physics_file = os.path.join(processed_data_path, "synthetic_physics_snapshots_v1.csv")
-    
-    # Load real data
-    real_data = pd.read_csv(real_file)
-    print(f"Loaded {len(real_data)} real earthquakes")
-    
+    real_file = os.path.join(PROCESSED_DIR, "processed_earthquakes.parquet")
+    bootstrap_file = os.path.join(PROCESSED_DIR, "synthetic_bootstrap_v1.parquet")
+    physics_file = os.path.join(PROCESSED_DIR, "synthetic_physics_snapshots_v1.parquet")
+
+    # Read all three inputs as Arrow tables and combine them with a single
+    # concatenation: permissive promotion fills columns missing from a
+    # source with nulls (like pd.concat did), the chunked assemble is
+    # zero-copy, and the one-off to_pandas conversion materializes the
+    # combined columns exactly once
+    real_table = pq.read_table(real_file)
+    bootstrap_table = pq.read_table(bootstrap_file)
+    physics_table = pq.read_table(physics_file)
+
+    n_real = real_table.num_rows
+    print(f"Loaded {n_real} real earthquakes")
+
     # Add is_synthetic and sample_weight columns to real data if not present
-    if 'is_synthetic' not in real_data.columns:
-        real_data['is_synthetic'] = 0
-    if 'sample_weight' not in real_data.columns:
-        real_data['sample_weight'] = 1.0
-    if 'method' not in real_data.columns:
-        real_data['method'] = 'real'
-    
-    # Load synthetic data
-    bootstrap_data = pd.read_csv(bootstrap_file)
-    physics_data = pd.read_csv(physics_file)
-    print(f"Loaded {len(bootstrap_data)} bootstrap synthetic earthquakes")
-    print(f"Loaded {len(physics_data)} physics-based synthetic earthquakes")
-    
+    if 'is_synthetic' not in real_table.column_names:
+        real_table = real_table.append_column('is_synthetic', pa.array([0] * n_real))
+    if 'sample_weight' not in real_table.column_names:
+        real_table = real_table.append_column('sample_weight', pa.array([1.0] * n_real))
+    if 'method' not in real_table.column_names:
+        real_table = real_table.append_column('method', pa.array(['real'] * n_real))
+
+    print(f"Loaded {bootstrap_table.num_rows} bootstrap synthetic earthquakes")
+    print(f"Loaded {physics_table.num_rows} physics-based synthetic earthquakes")
+
     # Combine all datasets
-    all_data = pd.concat([real_data, bootstrap_data, physics_data], ignore_index=True)
+    all_data = pa.concat_tables(
+        [real_table, bootstrap_table, physics_table],
+        promote_options='permissive'
+    ).to_pandas()
     print(f"Combined dataset has {len(all_data)} earthquakes")
     
     # Verify all required columns exist
@@ -61,8 +74,8 @@ def assemble_dataset():
     if missing_columns:
         print(f"Warning: Missing columns in combined dataset: {missing_columns}")
     
-    # Convert time to datetime for time-based partitioning
-    all_data['datetime'] = pd.to_datetime(all_data['time'])
+    # All inputs carry a typed time column, so no string re-parsing is needed
+    all_data['datetime'] = all_data['time']
     all_data['year'] = all_data['datetime'].dt.year
     
     # Create time-based CV folds (e.g., 3-year blocks)
@@ -72,22 +85,38 @@ def assemble_dataset():
         (2021, 2025)
     ]
     
-    all_data['cv_fold'] = -1
-    for fold_idx, (start_year, end_year) in enumerate(fold_years):
-        mask = (all_data['year'] >= start_year) & (all_data['year'] <= end_year)
-        all_data.loc[mask, 'cv_fold'] = fold_idx
-    
+    # One searchsorted pass over the fold start years replaces the seven
+    # masked column writes; years outside the folds on either side map to
+    # -1 as the masked writes left them
+    fold_starts = np.array([start_year for start_year, _ in fold_years])
+    years = all_data['year'].to_numpy()
+    cv_fold = np.searchsorted(fold_starts, years, side='right') - 1
+    cv_fold[years > fold_years[-1][1]] = -1
+    all_data['cv_fold'] = cv_fold
+
+    fold_col = all_data['cv_fold'].to_numpy()
+    fold_counts = np.bincount(fold_col[fold_col >= 0], minlength=len(fold_years))
+
     print("Created CV folds based on time blocks:")
     for fold_idx, (start_year, end_year) in enumerate(fold_years):
-        fold_count = sum(all_data['cv_fold'] == fold_idx)
-        print(f"  Fold {fold_idx} ({start_year}-{end_year}): {fold_count} events")
+        print(f"  Fold {fold_idx} ({start_year}-{end_year}): {fold_counts[fold_idx]} events")
     
-    # Print summary of synthetic vs real events by magnitude range
+    # Print summary of synthetic vs real events by magnitude range.
+    # searchsorted + np.add.at builds the bin-by-method table in one C pass
+    # (side='left' keeps the right-closed bins pd.cut used; out-of-range
+    # magnitudes are dropped just like pd.cut's NaN bins)
     print("\nData distribution by magnitude range and type:")
-    mag_bins = [3.0, 4.0, 5.0, 6.0, 7.0, 8.0]
-    all_data['mag_range'] = pd.cut(all_data['magnitude'], mag_bins)
-    
-    summary = all_data.groupby(['mag_range', 'method']).size().unstack(fill_value=0)
+    mag_bins = np.array([3.0, 4.0, 5.0, 6.0, 7.0, 8.0])
+    mags = all_data['magnitude'].to_numpy()
+    bin_idx = np.searchsorted(mag_bins, mags, side='left') - 1
+    in_range = (bin_idx >= 0) & (bin_idx < len(mag_bins) - 1)
+    method_codes, method_names = pd.factorize(all_data['method'])
+
+    counts = np.zeros((len(mag_bins) - 1, len(method_names)), dtype=np.int64)
+    np.add.at(counts, (bin_idx[in_range], method_codes[in_range]), 1)
+
+    bin_labels = [f"({lo}, {hi}]" for lo, hi in zip(mag_bins[:-1], mag_bins[1:])]
+    summary = pd.DataFrame(counts, index=bin_labels, columns=method_names)
     print(summary)
     
     # Visualize the combined dataset
@@ -96,13 +125,21 @@ def assemble_dataset():
     # Create a colormap for different data sources
     colors = {'real': 'blue', 'bootstrap': 'green', 'physics': 'red'}
     markers = {'real': 'o', 'bootstrap': '^', 'physics': '*'}
-    
-    for method, group in all_data.groupby('method'):
-        plt.scatter(group['longitude'], group['latitude'],
-                   s=group['magnitude']**2, alpha=0.6, 
-                   c=colors.get(method, 'gray'),
-                   marker=markers.get(method, 'o'),
-                   label=f"{method.capitalize()} ({len(group)})")
+
+    # One scatter per method is still needed for the distinct marker shapes,
+    # but coordinates and sizes are extracted once and each method's rows
+    # come from the factorized codes computed for the summary above
+    lon = all_data['longitude'].to_numpy()
+    lat = all_data['latitude'].to_numpy()
+    sizes = all_data['magnitude'].to_numpy() ** 2
+
+    for code, method in enumerate(method_names):
+        sel = method_codes == code
+        plt.scatter(lon[sel], lat[sel], s=sizes[sel], alpha=0.6,
+                    c=colors.get(method, 'gray'),
+                    marker=markers.get(method, 'o'),
+                    label=f"{method.capitalize()} ({sel.sum()})",
+                    rasterized=True)
     
     # Add labels and legend
     plt.xlabel('Longitude (E)')
@@ -116,36 +153,44 @@ def assemble_dataset():
     plt.ylim(39.5, 41.5)
     
     # Save plot
-    plot_file = os.path.join(outputs_path, "combined_dataset.png")
+    plot_file = os.path.join(OUTPUTS_DIR, "combined_dataset.png")
     plt.savefig(plot_file, dpi=300)
     plt.close()
     print(f"Combined dataset visualization saved to {plot_file}")
     
-    # Save final dataset
-    output_file = os.path.join(processed_data_path, "combined_dataset_v1.csv")
-    all_data.to_csv(output_file, index=False)
+    # Save final dataset (Arrow's parquet writer runs in parallel C and the
+    # columnar file is a fraction of the CSV size)
+    output_file = os.path.join(PROCESSED_DIR, "combined_dataset_v1.parquet")
+    pq.write_table(pa.Table.from_pandas(all_data, preserve_index=False),
+                   output_file, compression='zstd')
     print(f"Combined dataset saved to {output_file}")
     
-    # Generate dataset metrics
+    # Generate dataset metrics. Method counts come from one bincount over
+    # the factorized codes and the magnitude extremes from the array already
+    # extracted for the summary table, instead of a full-column boolean scan
+    # per metric
+    method_count_map = dict(zip(method_names, np.bincount(method_codes)))
+    n_synthetic = int(all_data['is_synthetic'].to_numpy().sum())
+
     metrics = {
         "total_earthquakes": len(all_data),
-        "real_events": sum(all_data['is_synthetic'] == 0),
-        "synthetic_events": sum(all_data['is_synthetic'] == 1),
-        "bootstrap_synthetics": sum(all_data['method'] == 'bootstrap'),
-        "physics_synthetics": sum(all_data['method'] == 'physics'),
-        "magnitude_min": all_data['magnitude'].min(),
-        "magnitude_max": all_data['magnitude'].max(),
-        "real_magnitude_max": real_data['magnitude'].max(),
+        "real_events": len(all_data) - n_synthetic,
+        "synthetic_events": n_synthetic,
+        "bootstrap_synthetics": method_count_map.get('bootstrap', 0),
+        "physics_synthetics": method_count_map.get('physics', 0),
+        "magnitude_min": mags.min(),
+        "magnitude_max": mags.max(),
+        "real_magnitude_max": pc.max(real_table['magnitude']).as_py(),
         "synthetic_magnitude_min": min(
-            bootstrap_data['magnitude'].min(),
-            physics_data['magnitude'].min()
+            pc.min(bootstrap_table['magnitude']).as_py(),
+            pc.min(physics_table['magnitude']).as_py()
         ),
         "date_range": f"{all_data['datetime'].min()} to {all_data['datetime'].max()}",
         "cv_folds": len(fold_years)
     }
     
     # Save metrics
-    metrics_file = os.path.join(outputs_path, "dataset_metrics.txt")
+    metrics_file = os.path.join(OUTPUTS_DIR, "dataset_metrics.txt")
     with open(metrics_file, 'w') as f:
         f.write("=== Dataset Metrics ===\n\n")
         for key, value in metrics.items():
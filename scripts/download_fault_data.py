@@ -1,23 +1,18 @@
 import os
 import pandas as pd
+from _paths import RAW_DIR
 
 def download_fault_data():
     """
     Create simplified fault data for the Marmara region
     """
     print("Creating simplified fault data for Marmara region...")
-    
-    # Get the absolute path to the project directory
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_dir = os.path.dirname(script_dir)
-    raw_data_path = os.path.join(project_dir, "data", "raw")
-    
-    print(f"Script directory: {script_dir}")
-    print(f"Project directory: {project_dir}")
-    print(f"Raw data path: {raw_data_path}")
-    
+
+    # Project directories come from _paths, resolved once at import
+    print(f"Raw data path: {RAW_DIR}")
+
     # Create raw data directory if it doesn't exist
-    os.makedirs(raw_data_path, exist_ok=True)
+    os.makedirs(RAW_DIR, exist_ok=True)
     
     # Main segments of the North Anatolian Fault in Marmara region
     # These are approximate and simplified locations
@@ -64,11 +59,19 @@ def download_fault_data():
         }
     ]
     
+    # Pre-split the coordinate strings into per-axis columns (SoA form) so
+    # readers can parse each axis with a single numeric pass instead of
+    # splitting point-by-point in Python
+    for segment in fault_segments:
+        pairs = [pair.split(',') for pair in segment['coordinates'].split(';')]
+        segment['lon_coords'] = ';'.join(pair[0] for pair in pairs)
+        segment['lat_coords'] = ';'.join(pair[1] for pair in pairs)
+
     # Create a DataFrame
     fault_data = pd.DataFrame(fault_segments)
     
     # Save to CSV
-    fault_csv_path = os.path.join(raw_data_path, "marmara_faults.csv")
+    fault_csv_path = os.path.join(RAW_DIR, "marmara_faults.csv")
     try:
         fault_data.to_csv(fault_csv_path, index=False)
         
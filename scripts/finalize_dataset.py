@@ -2,6 +2,15 @@ import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv
+import pyarrow.parquet as pq
+from _paths import PROCESSED_DIR, OUTPUTS_DIR
+
+# Collapse dense vector paths before encoding; see also rasterized=True on
+# the scatter calls, which keeps big point clouds out of the vector layer
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
 
 def finalize_dataset():
     """
@@ -15,48 +24,50 @@ def finalize_dataset():
     """
     print("Finalizing combined earthquake dataset...")
     
-    # Get paths
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_dir = os.path.dirname(script_dir)
-    processed_data_path = os.path.join(project_dir, "data", "processed")
-    outputs_path = os.path.join(project_dir, "outputs")
+    # Project directories come from _paths, resolved once at import
     
     # Ensure output directory exists
-    os.makedirs(outputs_path, exist_ok=True)
+    os.makedirs(OUTPUTS_DIR, exist_ok=True)
     
     # Load datasets
-    real_file = os.path.join(processed_data_path, "processed_earthquakes.csv")
-    bootstrap_file = os.path.join(processed_data_path, "synthetic_bootstrap_v1.csv")
-    physics_file = os.path.join(processed_data_path, "synthetic_physics_snapshots_v1.csv")
-    simple_file = os.path.join(processed_data_path, "synthetic_simple_v1.csv")
-    
-    # Load real data
-    real_data = pd.read_csv(real_file)
-    print(f"Loaded {len(real_data)} real earthquakes")
-    
+    real_file = os.path.join(PROCESSED_DIR, "processed_earthquakes.parquet")
+    bootstrap_file = os.path.join(PROCESSED_DIR, "synthetic_bootstrap_v1.parquet")
+    physics_file = os.path.join(PROCESSED_DIR, "synthetic_physics_snapshots_v1.parquet")
+    simple_file = os.path.join(PROCESSED_DIR, "synthetic_simple_v1.parquet")
+
+    # Read all four inputs as Arrow tables and combine them with a single
+    # concatenation: permissive promotion fills columns missing from a
+    # source with nulls (like pd.concat did) and the one-off to_pandas
+    # conversion is zero-copy for the numeric columns
+    real_table = pq.read_table(real_file)
+    bootstrap_table = pq.read_table(bootstrap_file)
+    physics_table = pq.read_table(physics_file)
+    simple_table = pq.read_table(simple_file)
+
+    n_real = real_table.num_rows
+    print(f"Loaded {n_real} real earthquakes")
+
     # Add is_synthetic and sample_weight columns to real data if not present
-    if 'is_synthetic' not in real_data.columns:
-        real_data['is_synthetic'] = 0
-    if 'sample_weight' not in real_data.columns:
-        real_data['sample_weight'] = 1.0
-    if 'method' not in real_data.columns:
-        real_data['method'] = 'real'
-    
-    # Load synthetic data
-    bootstrap_data = pd.read_csv(bootstrap_file)
-    physics_data = pd.read_csv(physics_file)
-    simple_data = pd.read_csv(simple_file)
-    
-    print(f"Loaded {len(bootstrap_data)} bootstrap synthetic earthquakes")
-    print(f"Loaded {len(physics_data)} physics-based synthetic earthquakes")
-    print(f"Loaded {len(simple_data)} simple synthetic earthquakes")
-    
+    if 'is_synthetic' not in real_table.column_names:
+        real_table = real_table.append_column('is_synthetic', pa.array([0] * n_real))
+    if 'sample_weight' not in real_table.column_names:
+        real_table = real_table.append_column('sample_weight', pa.array([1.0] * n_real))
+    if 'method' not in real_table.column_names:
+        real_table = real_table.append_column('method', pa.array(['real'] * n_real))
+
+    print(f"Loaded {bootstrap_table.num_rows} bootstrap synthetic earthquakes")
+    print(f"Loaded {physics_table.num_rows} physics-based synthetic earthquakes")
+    print(f"Loaded {simple_table.num_rows} simple synthetic earthquakes")
+
     # Combine all datasets
-    all_data = pd.concat([real_data, bootstrap_data, physics_data, simple_data], ignore_index=True)
+    all_data = pa.concat_tables(
+        [real_table, bootstrap_table, physics_table, simple_table],
+        promote_options='permissive'
+    ).to_pandas()
     print(f"Final combined dataset has {len(all_data)} earthquakes")
     
-    # Convert time to datetime for time-based partitioning
-    all_data['datetime'] = pd.to_datetime(all_data['time'])
+    # All inputs carry a typed time column, so no string re-parsing is needed
+    all_data['datetime'] = all_data['time']
     all_data['year'] = all_data['datetime'].dt.year
     
     # Create time-based CV folds (e.g., 3-year blocks)
@@ -66,17 +77,34 @@ def finalize_dataset():
         (2021, 2025)
     ]
     
-    all_data['cv_fold'] = -1
-    for fold_idx, (start_year, end_year) in enumerate(fold_years):
-        mask = (all_data['year'] >= start_year) & (all_data['year'] <= end_year)
-        all_data.loc[mask, 'cv_fold'] = fold_idx
+    # One searchsorted pass over the fold start years replaces the seven
+    # masked column writes; years outside the folds on either side map to
+    # -1 as the masked writes left them
+    fold_starts = np.array([start_year for start_year, _ in fold_years])
+    years = all_data['year'].to_numpy()
+    cv_fold = np.searchsorted(fold_starts, years, side='right') - 1
+    cv_fold[years > fold_years[-1][1]] = -1
+    all_data['cv_fold'] = cv_fold
+
+    fold_col = all_data['cv_fold'].to_numpy()
+    fold_counts = np.bincount(fold_col[fold_col >= 0], minlength=len(fold_years))
     
-    # Print summary of synthetic vs real events by magnitude range
+    # Print summary of synthetic vs real events by magnitude range.
+    # searchsorted + np.add.at builds the bin-by-method table in one C pass
+    # (side='left' keeps the right-closed bins pd.cut used; out-of-range
+    # magnitudes are dropped just like pd.cut's NaN bins)
     print("\nFinal data distribution by magnitude range and type:")
-    mag_bins = [3.0, 4.0, 5.0, 6.0, 7.0, 8.0]
-    all_data['mag_range'] = pd.cut(all_data['magnitude'], mag_bins)
-    
-    summary = all_data.groupby(['mag_range', 'method']).size().unstack(fill_value=0)
+    mag_bins = np.array([3.0, 4.0, 5.0, 6.0, 7.0, 8.0])
+    mags = all_data['magnitude'].to_numpy()
+    bin_idx = np.searchsorted(mag_bins, mags, side='left') - 1
+    in_range = (bin_idx >= 0) & (bin_idx < len(mag_bins) - 1)
+    method_codes, method_names = pd.factorize(all_data['method'])
+
+    counts = np.zeros((len(mag_bins) - 1, len(method_names)), dtype=np.int64)
+    np.add.at(counts, (bin_idx[in_range], method_codes[in_range]), 1)
+
+    bin_labels = [f"({lo}, {hi}]" for lo, hi in zip(mag_bins[:-1], mag_bins[1:])]
+    summary = pd.DataFrame(counts, index=bin_labels, columns=method_names)
     print(summary)
     
     # Create stacked bar chart of magnitude distribution
@@ -105,7 +133,7 @@ def finalize_dataset():
     plt.grid(True, alpha=0.3)
     
     # Save magnitude distribution chart
-    mag_plot_file = os.path.join(outputs_path, "magnitude_distribution.png")
+    mag_plot_file = os.path.join(OUTPUTS_DIR, "magnitude_distribution.png")
     plt.savefig(mag_plot_file, dpi=300)
     plt.close()
     print(f"Magnitude distribution chart saved to {mag_plot_file}")
@@ -116,13 +144,21 @@ def finalize_dataset():
     # Create a colormap for different data sources
     colors = {'real': 'blue', 'bootstrap': 'green', 'physics': 'red', 'simple': 'purple'}
     markers = {'real': 'o', 'bootstrap': '^', 'physics': '*', 'simple': 'd'}
-    
-    for method, group in all_data.groupby('method'):
-        plt.scatter(group['longitude'], group['latitude'],
-                   s=group['magnitude']**2, alpha=0.6, 
-                   c=colors.get(method, 'gray'),
-                   marker=markers.get(method, 'o'),
-                   label=f"{method.capitalize()} ({len(group)})")
+
+    # One scatter per method is still needed for the distinct marker shapes,
+    # but coordinates and sizes are extracted once and each method's rows
+    # come from the factorized codes computed for the summary above
+    lon = all_data['longitude'].to_numpy()
+    lat = all_data['latitude'].to_numpy()
+    sizes = all_data['magnitude'].to_numpy() ** 2
+
+    for code, method in enumerate(method_names):
+        sel = method_codes == code
+        plt.scatter(lon[sel], lat[sel], s=sizes[sel], alpha=0.6,
+                    c=colors.get(method, 'gray'),
+                    marker=markers.get(method, 'o'),
+                    label=f"{method.capitalize()} ({sel.sum()})",
+                    rasterized=True)
     
     # Add labels and legend
     plt.xlabel('Longitude (E)')
@@ -136,37 +172,38 @@ def finalize_dataset():
     plt.ylim(39.5, 41.5)
     
     # Save plot
-    plot_file = os.path.join(outputs_path, "final_dataset.png")
+    plot_file = os.path.join(OUTPUTS_DIR, "final_dataset.png")
     plt.savefig(plot_file, dpi=300)
     plt.close()
     print(f"Final dataset visualization saved to {plot_file}")
     
-    # Save final dataset
-    output_file = os.path.join(processed_data_path, "final_dataset_v1.csv")
-    all_data.to_csv(output_file, index=False)
+    # Save final dataset (kept as CSV for users, but written with Arrow's
+    # parallel writer instead of pandas' Python-level row formatting)
+    output_file = os.path.join(PROCESSED_DIR, "final_dataset_v1.csv")
+    pa.csv.write_csv(pa.Table.from_pandas(all_data, preserve_index=False), output_file)
     print(f"Final combined dataset saved to {output_file}")
     
     # Generate summary report
-    report_file = os.path.join(outputs_path, "synthetic_data_report.md")
+    report_file = os.path.join(OUTPUTS_DIR, "synthetic_data_report.md")
     with open(report_file, 'w') as f:
         f.write("# Synthetic Earthquake Dataset Report\n\n")
         
         f.write("## Dataset Summary\n\n")
         f.write(f"Total events: {len(all_data)}\n")
-        f.write(f"Real events: {len(real_data)}\n")
-        f.write(f"Synthetic events: {len(all_data) - len(real_data)}\n\n")
+        f.write(f"Real events: {n_real}\n")
+        f.write(f"Synthetic events: {len(all_data) - n_real}\n\n")
         
         f.write("## Synthetic Data Methods\n\n")
-        f.write(f"1. **Bootstrap method**: {len(bootstrap_data)} events\n")
+        f.write(f"1. **Bootstrap method**: {bootstrap_table.num_rows} events\n")
         f.write("   - Created by scaling up moderate (M5-6) real events\n")
         f.write("   - Sample weight: 0.3\n\n")
         
-        f.write(f"2. **Physics-based method**: {len(physics_data)} events\n")
+        f.write(f"2. **Physics-based method**: {physics_table.num_rows} events\n")
         f.write("   - Generated using fault geometry and physical parameters\n")
         f.write("   - Based on Gutenberg-Richter relation with b-value = 0.77\n")
         f.write("   - Sample weight: 0.5\n\n")
         
-        f.write(f"3. **Simple method**: {len(simple_data)} events\n")
+        f.write(f"3. **Simple method**: {simple_table.num_rows} events\n")
         f.write("   - Created by spatial jittering from template events\n")
         f.write("   - Sample weight: 0.2\n\n")
         
@@ -181,8 +218,7 @@ def finalize_dataset():
         f.write("## Cross-Validation Folds\n\n")
         f.write("The dataset is divided into time-based CV folds:\n\n")
         for fold_idx, (start_year, end_year) in enumerate(fold_years):
-            fold_count = sum(all_data['cv_fold'] == fold_idx)
-            f.write(f"- Fold {fold_idx} ({start_year}-{end_year}): {fold_count} events\n")
+            f.write(f"- Fold {fold_idx} ({start_year}-{end_year}): {fold_counts[fold_idx]} events\n")
         
         f.write("\n## Usage for Forecasting\n\n")
         f.write("When training earthquake forecasting models:\n\n")
@@ -3,7 +3,13 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
-import random
+from _loaders import load_catalog
+from _paths import PROCESSED_DIR, OUTPUTS_DIR
+
+# Collapse dense vector paths before encoding; see also rasterized=True on
+# the scatter calls, which keeps big point clouds out of the vector layer
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
 
 def generate_bootstrap_synthetics():
     """
@@ -12,97 +18,82 @@ def generate_bootstrap_synthetics():
     """
     print("Generating bootstrap synthetic earthquakes...")
     
-    # Get paths
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_dir = os.path.dirname(script_dir)
-    processed_data_path = os.path.join(project_dir, "data", "processed")
-    outputs_path = os.path.join(project_dir, "outputs")
+    # Project directories come from _paths, resolved once at import
     
     # Ensure outputs directory exists
-    os.makedirs(outputs_path, exist_ok=True)
+    os.makedirs(OUTPUTS_DIR, exist_ok=True)
     
-    # Load processed earthquake data
-    eq_file = os.path.join(processed_data_path, "processed_earthquakes.csv")
-    eq_data = pd.read_csv(eq_file)
+    # Load processed earthquake data through the shared cached reader (the
+    # Parquet file carries a typed time column, and the cache serves later
+    # reads of the same catalog in this process for free): only the columns
+    # the templates carry forward, pruned at the reader, as float32
+    eq_file = os.path.join(PROCESSED_DIR, "processed_earthquakes.parquet")
+    eq_data = load_catalog(eq_file, columns=('id', 'time', 'magnitude',
+                                             'longitude', 'latitude',
+                                             'depth_km', 'log_energy'))
     print(f"Loaded {len(eq_data)} earthquakes from {eq_file}")
-    
-    # Convert time to datetime for time-based filtering
-    eq_data['datetime'] = pd.to_datetime(eq_data['time'])
-    
+
     # Step 1: Filter moderate events (5<=M<6) to use as templates
     template_events = eq_data[(eq_data['magnitude'] >= 5.0) & (eq_data['magnitude'] < 6.0)].copy()
     print(f"Found {len(template_events)} template events (5.0 <= M < 6.0)")
     
-    # Step 2: Create synthetic events by scaling magnitude and adjusting parameters
-    synthetic_events = []
-    
-    for _, event in template_events.iterrows():
-        # Define parameters for the synthetic event
-        original_mag = event['magnitude']
-        
-        # Generate a random magnitude increase (target M6.5-7.3)
-        magnitude_increase = random.uniform(1.5, 2.3)
-        new_mag = original_mag + magnitude_increase
-        
-        # Copy the original event
-        synthetic = event.copy()
-        
-        # Scale magnitude-dependent parameters according to roadmap
-        
-        # 1. Adjust magnitude
-        synthetic['magnitude'] = new_mag
-        synthetic['id'] = f"SYN_{event['id']}"
-        
-        # 2. Scale Benioff strain ∝ 10^(1.5 ΔM)
-        benioff_scaling = 10 ** (1.5 * magnitude_increase)
-        synthetic['log_energy'] = event['log_energy'] + 1.5 * magnitude_increase
-        
-        # 3. Scale stress drop using Leonard (2010) scaling
-        # Simplified: stress drop ~ (10^(0.5*magnitude_increase))
-        stress_scaling = 10 ** (0.5 * magnitude_increase)
-        
-        # 4. Calculate rupture dimensions using Wells-Coppersmith relations
-        # Log(L) = -2.44 + 0.59M (subsurface rupture length in km)
-        original_length = 10 ** (-2.44 + 0.59 * original_mag)
-        new_length = 10 ** (-2.44 + 0.59 * new_mag)
-        
-        # Log(W) = -1.01 + 0.32M (subsurface rupture width in km)
-        original_width = 10 ** (-1.01 + 0.32 * original_mag)
-        new_width = 10 ** (-1.01 + 0.32 * new_mag)
-        
-        # Add rupture dimensions to synthetic event
-        synthetic['rupture_length_km'] = new_length
-        synthetic['rupture_width_km'] = new_width
-        synthetic['rupture_area_km2'] = new_length * new_width
-        
-        # Keep location (grid_id) and original time
-        # As per roadmap: "Keep time, grid_id, background stress unchanged"
-        
-        # Tag as synthetic with weight=0.3
-        synthetic['is_synthetic'] = 1
-        synthetic['sample_weight'] = 0.3
-        synthetic['method'] = 'bootstrap'
-        
-        # Add to synthetic events list
-        synthetic_events.append(synthetic)
-    
-    # Create a DataFrame with synthetic events
-    if synthetic_events:
-        synthetics_df = pd.DataFrame(synthetic_events)
-        
-        # Perform sanity checks (as per roadmap)
-        invalid_events = synthetics_df[
-            (synthetics_df['depth_km'] < 0) | 
+    # Step 2: Create synthetic events by scaling magnitude and adjusting
+    # parameters. All scaling relations are plain arithmetic, so the whole
+    # batch is computed as column-wise numpy operations on a copy of the
+    # template frame instead of building one Series per row
+    n_templates = len(template_events)
+
+    # Generate random magnitude increases (target M6.5-7.3) in one batch
+    rng = np.random.default_rng()
+    magnitude_increase = rng.uniform(1.5, 2.3, n_templates)
+
+    synthetics_df = template_events.copy()
+
+    # 1. Adjust magnitude
+    new_mag = synthetics_df['magnitude'].to_numpy() + magnitude_increase
+    synthetics_df['magnitude'] = new_mag
+    synthetics_df['id'] = 'SYN_' + synthetics_df['id'].astype(str)
+
+    # 2. Scale Benioff strain ∝ 10^(1.5 ΔM)
+    synthetics_df['log_energy'] = (
+        synthetics_df['log_energy'].to_numpy() + 1.5 * magnitude_increase
+    )
+
+    # 3. Calculate rupture dimensions using Wells-Coppersmith relations
+    # Log(L) = -2.44 + 0.59M (subsurface rupture length in km)
+    # Log(W) = -1.01 + 0.32M (subsurface rupture width in km)
+    new_length = 10 ** (-2.44 + 0.59 * new_mag)
+    new_width = 10 ** (-1.01 + 0.32 * new_mag)
+    synthetics_df['rupture_length_km'] = new_length
+    synthetics_df['rupture_width_km'] = new_width
+    synthetics_df['rupture_area_km2'] = new_length * new_width
+
+    # Keep location (grid_id) and original time
+    # As per roadmap: "Keep time, grid_id, background stress unchanged"
+
+    # Tag as synthetic with weight=0.3
+    synthetics_df['is_synthetic'] = 1
+    synthetics_df['sample_weight'] = 0.3
+    synthetics_df['method'] = 'bootstrap'
+    synthetics_df = synthetics_df.reset_index(drop=True)
+
+    if not synthetics_df.empty:
+
+        # Perform sanity checks (as per roadmap); one boolean mask instead
+        # of materializing the invalid rows just to take their index
+        bad = (
+            (synthetics_df['depth_km'] < 0) |
             (synthetics_df['rupture_length_km'] > 200)
-        ]
-        
-        if not invalid_events.empty:
-            print(f"Warning: Found {len(invalid_events)} events with unphysical values. Removing them.")
-            synthetics_df = synthetics_df[~synthetics_df.index.isin(invalid_events.index)]
-        
-        # Save synthetic events
-        output_file = os.path.join(processed_data_path, "synthetic_bootstrap_v1.csv")
-        synthetics_df.to_csv(output_file, index=False)
+        )
+
+        if bad.any():
+            print(f"Warning: Found {int(bad.sum())} events with unphysical values. Removing them.")
+            synthetics_df = synthetics_df.loc[~bad]
+        
+        # Save synthetic events (Parquet: typed columns for the downstream
+        # scripts and much faster to write/read than CSV)
+        output_file = os.path.join(PROCESSED_DIR, "synthetic_bootstrap_v1.parquet")
+        synthetics_df.to_parquet(output_file, engine='pyarrow', index=False)
         print(f"Generated {len(synthetics_df)} synthetic events with magnitudes {synthetics_df['magnitude'].min():.1f}-{synthetics_df['magnitude'].max():.1f}")
         print(f"Synthetic data saved to {output_file}")
         
@@ -112,12 +103,12 @@ def generate_bootstrap_synthetics():
         # Plot original events
         plt.scatter(eq_data['longitude'], eq_data['latitude'], 
                    s=eq_data['magnitude']**2, alpha=0.5, c='blue',
-                   label='Original Events')
+                   rasterized=True, label='Original Events')
         
         # Plot synthetic events
         plt.scatter(synthetics_df['longitude'], synthetics_df['latitude'],
                    s=synthetics_df['magnitude']**2, alpha=0.8, c='red',
-                   marker='*', label='Synthetic Events (Bootstrap)')
+                   marker='*', rasterized=True, label='Synthetic Events (Bootstrap)')
         
         # Add labels and legend
         plt.xlabel('Longitude (E)')
@@ -127,7 +118,7 @@ def generate_bootstrap_synthetics():
         plt.grid(True, alpha=0.3)
         
         # Save plot
-        plot_file = os.path.join(outputs_path, "bootstrap_synthetics.png")
+        plot_file = os.path.join(OUTPUTS_DIR, "bootstrap_synthetics.png")
         plt.savefig(plot_file, dpi=300)
         plt.close()
         print(f"Comparison plot saved to {plot_file}")
@@ -2,9 +2,33 @@ import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
-import random
+from matplotlib.collections import LineCollection
+from datetime import datetime
 import math
+from numba import njit
+from _loaders import load_catalog
+from _paths import RAW_DIR, PROCESSED_DIR, OUTPUTS_DIR
+
+# Collapse dense vector paths before encoding; see also rasterized=True on
+# the scatter calls, which keeps big point clouds out of the vector layer
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
+
+@njit(cache=True, fastmath=True)
+def hav_len(lats, lons):
+    """
+    Total Haversine length (km) of a polyline given vertex latitudes and
+    longitudes already converted to radians. A jitted scalar loop: no
+    temporaries, and the sin/cos/sqrt chain compiles to one tight kernel.
+    """
+    total = 0.0
+    r = 6371.0  # Radius of Earth in kilometers
+    for i in range(lats.shape[0] - 1):
+        dlat = lats[i + 1] - lats[i]
+        dlon = lons[i + 1] - lons[i]
+        a = math.sin(dlat / 2) ** 2 + math.cos(lats[i]) * math.cos(lats[i + 1]) * math.sin(dlon / 2) ** 2
+        total += 2 * r * math.asin(math.sqrt(a))
+    return total
 
 def generate_physics_snapshots():
     """
@@ -15,28 +39,24 @@ def generate_physics_snapshots():
     """
     print("Generating physics-based synthetic earthquakes...")
     
-    # Get paths
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_dir = os.path.dirname(script_dir)
-    raw_data_path = os.path.join(project_dir, "data", "raw")
-    processed_data_path = os.path.join(project_dir, "data", "processed")
-    outputs_path = os.path.join(project_dir, "outputs")
+    # Project directories come from _paths, resolved once at import
     
     # Ensure directories exist
-    os.makedirs(processed_data_path, exist_ok=True)
-    os.makedirs(outputs_path, exist_ok=True)
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
+    os.makedirs(OUTPUTS_DIR, exist_ok=True)
     
     # Load fault data
-    fault_file = os.path.join(raw_data_path, "marmara_faults.csv")
+    fault_file = os.path.join(RAW_DIR, "marmara_faults.csv")
     fault_data = pd.read_csv(fault_file)
     print(f"Loaded {len(fault_data)} fault segments from {fault_file}")
     
-    # Load earthquake data (for reference)
-    eq_file = os.path.join(processed_data_path, "processed_earthquakes.csv")
-    eq_data = pd.read_csv(eq_file)
+    # Load earthquake data through the shared cached reader (for the
+    # reference plot only, so just the three columns it needs, as float32)
+    eq_file = os.path.join(PROCESSED_DIR, "processed_earthquakes.parquet")
+    eq_data = load_catalog(eq_file, columns=('longitude', 'latitude', 'magnitude'))
     
     # Try to read b-value from file
-    b_value_file = os.path.join(processed_data_path, "b_value.txt")
+    b_value_file = os.path.join(PROCESSED_DIR, "b_value.txt")
     if os.path.exists(b_value_file):
         try:
             with open(b_value_file, 'r') as f:
@@ -53,197 +73,176 @@ def generate_physics_snapshots():
     
     # Number of synthetic events to generate
     n_synthetics = 20  # Target is ~100, but start with fewer for testing
-    
-    # Step 1: Generate magnitudes from truncated GR distribution
-    magnitudes = []
-    for _ in range(n_synthetics):
-        # Using the formula from the roadmap: mag = 6.5 - np.log10(1 - np.random.rand()) / b_value
-        r = random.random()  # Random number between 0 and 1
-        mag = 6.5 - np.log10(1 - r) / b_value
-        # Cap at M7.3 as per roadmap
-        mag = min(mag, 7.3)
-        magnitudes.append(mag)
-    
+
+    # One generator for the whole run: every per-event random quantity is
+    # drawn as a batch up front, amortizing the RNG call overhead over all
+    # events instead of paying it one scalar at a time inside the loop
+    rng = np.random.default_rng()
+    mag_uniforms = rng.random(n_synthetics)
+    slip_variations = rng.lognormal(0, 0.3, n_synthetics)
+    month_offsets = rng.uniform(6, 12, n_synthetics)
+    depths = rng.uniform(5, 15, n_synthetics)  # Typical seismogenic depth in region
+    # 3D jitter (±5 km as per roadmap), converted to degrees (approximate)
+    degree_jitter = 0.045  # ~5km at this latitude
+    jitter_lon = rng.uniform(-degree_jitter, degree_jitter, n_synthetics)
+    jitter_lat = rng.uniform(-degree_jitter, degree_jitter, n_synthetics)
+
+    # Step 1: Generate magnitudes from truncated GR distribution, capped at
+    # M7.3 as per roadmap; the whole batch is one vector expression over
+    # the pre-drawn uniforms
+    magnitudes = np.minimum(6.5 - np.log10(1 - mag_uniforms) / b_value, 7.3)
+
     print(f"Generated {len(magnitudes)} synthetic magnitudes from truncated GR distribution")
-    print(f"Magnitude range: {min(magnitudes):.2f} to {max(magnitudes):.2f}")
+    print(f"Magnitude range: {magnitudes.min():.2f} to {magnitudes.max():.2f}")
     
     # Step 2: Assign to fault segments and calculate rupture dimensions
-    synthetic_events = []
-    
+
     # Create time spacing for events (6-12 months apart as per roadmap)
     start_date = datetime(2003, 1, 1)
     end_date = datetime(2025, 1, 1)
     total_months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
     months_per_event = total_months / n_synthetics
     
-    # Create a function to check if segment length is sufficient for rupture length
-    def segment_can_host_rupture(segment, rupture_length):
-        # Parse coordinates from string format
-        coords_str = segment['coordinates']
-        coord_pairs = coords_str.split(';')
-        
-        # Convert to float coordinates
-        coords = []
-        for pair in coord_pairs:
-            lon, lat = map(float, pair.split(','))
-            coords.append((lon, lat))
-        
-        # Calculate total segment length (simplified)
-        segment_length = 0
-        for i in range(len(coords) - 1):
-            # Haversine formula for distance between two points
-            lat1, lon1 = coords[i][1], coords[i][0]
-            lat2, lon2 = coords[i+1][1], coords[i+1][0]
-            
-            # Convert to radians
-            lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-            
-            # Haversine formula
-            dlon = lon2 - lon1
-            dlat = lat2 - lat1
-            a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-            c = 2 * math.asin(math.sqrt(a))
-            r = 6371  # Radius of Earth in kilometers
-            distance = c * r
-            
-            segment_length += distance
-        
-        return segment_length >= rupture_length
-    
-    # For each magnitude, calculate rupture dimensions and assign to fault segment
-    for i, magnitude in enumerate(magnitudes):
-        # Calculate rupture area using M0 = 10^(1.5*Mw + 9.1)
-        # log10(A_km2) = Mw – 4.0
-        rupture_area = 10 ** (magnitude - 4.0)
-        
-        # Using 2:1 aspect ratio as suggested in the roadmap
-        rupture_length = math.sqrt(rupture_area * 2)  # in km
-        rupture_width = rupture_length / 2  # in km
-        
-        # Find a suitable fault segment
-        # Start with random selection, then check if it can host the rupture
-        suitable_segments = []
-        for _, segment in fault_data.iterrows():
-            if segment_can_host_rupture(segment, rupture_length):
-                suitable_segments.append(segment)
-        
-        if not suitable_segments:
-            print(f"Warning: No suitable segment found for M{magnitude:.1f} event (needed {rupture_length:.1f} km)")
-            continue
-        
-        # Select a random suitable segment
-        selected_segment = random.choice(suitable_segments)
-        
-        # Calculate seismic moment
-        moment = 10 ** (1.5 * magnitude + 9.1)  # in Nm
-        
-        # Calculate average slip
-        mu = 3.2e10  # Shear modulus in Pa
-        avg_slip = moment / (mu * rupture_area * 1e6)  # Convert km² to m²
-        
-        # Add log-normal scatter to slip (±30% as per roadmap)
-        slip_variation = np.random.lognormal(0, 0.3)
-        slip = avg_slip * slip_variation
-        
-        # Generate origin time (spaced 6-12 months apart)
-        months_offset = random.uniform(6, 12) * i
-        origin_time = start_date + timedelta(days=months_offset * 30)  # Approximate
-        
-        # Create the synthetic event record
-        synthetic = {
-            'id': f"SYN_PHYS_{i+1:03d}",
-            'time': origin_time.strftime("%Y-%m-%d %H:%M:%S"),
-            'magnitude': magnitude,
-            'depth_km': random.uniform(5, 15),  # Typical seismogenic depth in region
-            'segment_id': selected_segment['segment_id'],
-            'rupture_length_km': rupture_length,
-            'rupture_width_km': rupture_width,
-            'rupture_area_km2': rupture_area,
-            'avg_slip_m': avg_slip,
+    # Parse every segment's coordinate string exactly once, before the
+    # magnitude loop, into a single padded 3D array
+    # coords_arr[segment, vertex, (lon, lat)] with a per-segment vertex
+    # count in seg_n_vertices (short segments are NaN-padded). All later
+    # consumers - length precomputation, random vertex sampling, and the
+    # LineCollection plot - index this array instead of re-splitting strings
+    parsed = [
+        np.column_stack((np.fromstring(lons, sep=';'), np.fromstring(lats, sep=';')))
+        for lons, lats in zip(fault_data['lon_coords'], fault_data['lat_coords'])
+    ]
+    seg_n_vertices = np.array([len(p) for p in parsed])
+    coords_arr = np.full((len(parsed), seg_n_vertices.max(), 2), np.nan)
+    for seg_idx, p in enumerate(parsed):
+        coords_arr[seg_idx, :len(p)] = p
+
+    # Segment lengths from the jitted hav_len kernel, fed radian arrays
+    # converted once per segment
+    coords_rad = np.radians(coords_arr)
+    seg_lengths = np.array([
+        hav_len(coords_rad[seg_idx, :n, 1], coords_rad[seg_idx, :n, 0])
+        for seg_idx, n in enumerate(seg_n_vertices)
+    ])
+
+    # Rupture dimensions and slip are plain arithmetic on the magnitude
+    # array, so they are computed for the whole batch at once:
+    # rupture area from M0 = 10^(1.5*Mw + 9.1), log10(A_km2) = Mw - 4.0,
+    # with the 2:1 aspect ratio suggested in the roadmap
+    rupture_areas = 10 ** (magnitudes - 4.0)
+    rupture_lengths = np.sqrt(rupture_areas * 2)  # in km
+    rupture_widths = rupture_lengths / 2  # in km
+
+    # Seismic moment and average slip
+    moments = 10 ** (1.5 * magnitudes + 9.1)  # in Nm
+    mu = 3.2e10  # Shear modulus in Pa
+    avg_slips = moments / (mu * rupture_areas * 1e6)  # Convert km² to m²
+
+    # Add log-normal scatter to slip (±30% as per roadmap)
+    slips = avg_slips * slip_variations
+
+    # Generate origin times (spaced 6-12 months apart, approximate)
+    times = (pd.Timestamp(start_date)
+             + pd.to_timedelta(month_offsets * np.arange(n_synthetics) * 30, unit='D'))
+
+    # Segment suitability for every event/segment pair comes from a single
+    # boolean broadcast; only the random pick among each row's suitable
+    # segments stays a (short) Python loop, since the rows have different
+    # candidate sets
+    suitable = seg_lengths[None, :] >= rupture_lengths[:, None]
+    chosen_segments = np.array([
+        rng.choice(np.flatnonzero(row)) if row.any() else -1
+        for row in suitable
+    ])
+    for i in np.flatnonzero(chosen_segments < 0):
+        print(f"Warning: No suitable segment found for M{magnitudes[i]:.1f} event (needed {rupture_lengths[i]:.1f} km)")
+
+    # Create a DataFrame with synthetic events: each column is passed as a
+    # ready ndarray (sliced to the events that found a segment), and the
+    # per-segment attributes come from one iloc take on fault_data
+    valid = chosen_segments >= 0
+    if valid.any():
+        valid_idx = np.flatnonzero(valid)
+        seg_idx = chosen_segments[valid_idx]
+        seg_sel = fault_data.iloc[seg_idx]
+
+        # Jittered random vertex of each chosen segment: one batched
+        # integer draw and one fancy-indexed gather from the padded
+        # coordinate array
+        vertex_idx = rng.integers(0, seg_n_vertices[seg_idx])
+        lons = coords_arr[seg_idx, vertex_idx, 0] + jitter_lon[valid_idx]
+        lats = coords_arr[seg_idx, vertex_idx, 1] + jitter_lat[valid_idx]
+
+        synthetics_df = pd.DataFrame({
+            'id': 'SYN_PHYS_' + pd.Series(valid_idx + 1).astype(str).str.zfill(3),
+            'time': times[valid],
+            'magnitude': magnitudes[valid],
+            'depth_km': depths[valid],
+            'segment_id': seg_sel['segment_id'].to_numpy(),
+            'rupture_length_km': rupture_lengths[valid],
+            'rupture_width_km': rupture_widths[valid],
+            'rupture_area_km2': rupture_areas[valid],
+            'avg_slip_m': avg_slips[valid],
             'is_synthetic': 1,
             'sample_weight': 0.5,  # As per roadmap
             'method': 'physics',
-            'strike': selected_segment['strike'],
-            'dip': selected_segment['dip'],
-            'rake': selected_segment['rake']
-        }
-        
-        # Parse coordinates to get event location (simplified)
-        # This just places the event at a random point along the segment
-        coords_str = selected_segment['coordinates']
-        coord_pairs = coords_str.split(';')
-        
-        # Choose a random point along the segment
-        rand_index = random.randint(0, len(coord_pairs) - 1)
-        lon, lat = map(float, coord_pairs[rand_index].split(','))
-        
-        # Add 3D jitter (±5 km as per roadmap)
-        # Convert ~5km to degrees (approximate)
-        degree_jitter = 0.045  # ~5km at this latitude
-        lon += random.uniform(-degree_jitter, degree_jitter)
-        lat += random.uniform(-degree_jitter, degree_jitter)
-        
-        synthetic['longitude'] = lon
-        synthetic['latitude'] = lat
-        
-        # Add to list of synthetic events
-        synthetic_events.append(synthetic)
-    
-    # Create a DataFrame with synthetic events
-    if synthetic_events:
-        synthetics_df = pd.DataFrame(synthetic_events)
-        
-        # Perform sanity checks (as per roadmap)
-        invalid_events = synthetics_df[
-            (synthetics_df['depth_km'] < 0) | 
+            'strike': seg_sel['strike'].to_numpy(),
+            'dip': seg_sel['dip'].to_numpy(),
+            'rake': seg_sel['rake'].to_numpy(),
+            'longitude': lons,
+            'latitude': lats,
+        })
+
+        # Perform sanity checks (as per roadmap); one boolean mask instead
+        # of materializing the invalid rows just to take their index
+        bad = (
+            (synthetics_df['depth_km'] < 0) |
             (synthetics_df['rupture_length_km'] > 200)
-        ]
-        
-        if not invalid_events.empty:
-            print(f"Warning: Found {len(invalid_events)} events with unphysical values. Removing them.")
-            synthetics_df = synthetics_df[~synthetics_df.index.isin(invalid_events.index)]
+        )
+
+        if bad.any():
+            print(f"Warning: Found {int(bad.sum())} events with unphysical values. Removing them.")
+            synthetics_df = synthetics_df.loc[~bad]
         
-        # Save synthetic events
-        output_file = os.path.join(processed_data_path, "synthetic_physics_snapshots_v1.csv")
-        synthetics_df.to_csv(output_file, index=False)
+        # Save synthetic events (Parquet: the typed time column survives the
+        # handoff, and the write is much faster than CSV)
+        output_file = os.path.join(PROCESSED_DIR, "synthetic_physics_snapshots_v1.parquet")
+        synthetics_df.to_parquet(output_file, engine='pyarrow', index=False)
         print(f"Generated {len(synthetics_df)} physics-based synthetic events")
         print(f"Synthetic data saved to {output_file}")
         
         # Visualize original and synthetic events
         plt.figure(figsize=(12, 8))
         
-        # Plot fault segments
-        for _, fault in fault_data.iterrows():
-            coords = fault['coordinates'].split(';')
-            x_coords = []
-            y_coords = []
-            
-            for coord in coords:
-                lon, lat = coord.split(',')
-                x_coords.append(float(lon))
-                y_coords.append(float(lat))
-            
-            plt.plot(x_coords, y_coords, 'k-', linewidth=1, alpha=0.7)
+        # Plot fault segments as one LineCollection artist built from the
+        # coordinate array already parsed for the length precomputation,
+        # instead of one plt.plot call (and one artist) per segment
+        fault_lines = LineCollection(
+            [coords_arr[seg_idx, :n] for seg_idx, n in enumerate(seg_n_vertices)],
+            colors='k', linewidths=1, alpha=0.7)
+        plt.gca().add_collection(fault_lines)
         
         # Plot original events
         plt.scatter(eq_data['longitude'], eq_data['latitude'], 
                    s=eq_data['magnitude']**2, alpha=0.3, c='blue',
-                   label='Original Events')
+                   rasterized=True, label='Original Events')
         
         # Plot bootstrap synthetic events
         try:
-            bootstrap_file = os.path.join(processed_data_path, "synthetic_bootstrap_v1.csv")
-            bootstrap_data = pd.read_csv(bootstrap_file)
+            bootstrap_file = os.path.join(PROCESSED_DIR, "synthetic_bootstrap_v1.parquet")
+            bootstrap_data = pd.read_parquet(
+                bootstrap_file, columns=['longitude', 'latitude', 'magnitude'])
             plt.scatter(bootstrap_data['longitude'], bootstrap_data['latitude'],
                        s=bootstrap_data['magnitude']**2, alpha=0.6, c='green',
-                       marker='o', label='Bootstrap Synthetics')
+                       marker='o', rasterized=True, label='Bootstrap Synthetics')
         except:
             print("Bootstrap synthetic data not found for comparison plot.")
         
         # Plot physics-based synthetic events
         plt.scatter(synthetics_df['longitude'], synthetics_df['latitude'],
                    s=synthetics_df['magnitude']**2, alpha=0.8, c='red',
-                   marker='*', label='Physics-based Synthetics')
+                   marker='*', rasterized=True, label='Physics-based Synthetics')
         
         # Add labels and legend
         plt.xlabel('Longitude (E)')
@@ -257,7 +256,7 @@ def generate_physics_snapshots():
         plt.ylim(39.5, 41.5)
         
         # Save plot
-        plot_file = os.path.join(outputs_path, "physics_synthetics.png")
+        plot_file = os.path.join(OUTPUTS_DIR, "physics_synthetics.png")
         plt.savefig(plot_file, dpi=300)
         plt.close()
         print(f"Comparison plot saved to {plot_file}")
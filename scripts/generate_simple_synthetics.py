@@ -2,7 +2,13 @@ import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import random
+from _loaders import load_catalog
+from _paths import PROCESSED_DIR, OUTPUTS_DIR
+
+# Collapse dense vector paths before encoding; see also rasterized=True on
+# the scatter calls, which keeps big point clouds out of the vector layer
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
 
 def generate_simple_synthetics():
     """
@@ -10,18 +16,18 @@ def generate_simple_synthetics():
     """
     print("Generating simple synthetic earthquakes...")
     
-    # Get paths
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_dir = os.path.dirname(script_dir)
-    processed_data_path = os.path.join(project_dir, "data", "processed")
-    outputs_path = os.path.join(project_dir, "outputs")
+    # Project directories come from _paths, resolved once at import
     
     # Ensure output directory exists
-    os.makedirs(outputs_path, exist_ok=True)
-    
-    # Load the combined dataset
-    combined_file = os.path.join(processed_data_path, "combined_dataset_v1.csv")
-    all_data = pd.read_csv(combined_file)
+    os.makedirs(OUTPUTS_DIR, exist_ok=True)
+    
+    # Load the combined dataset through the shared cached reader (only the
+    # columns used for templating and the comparison plot, pruned at the
+    # reader)
+    combined_file = os.path.join(PROCESSED_DIR, "combined_dataset_v1.parquet")
+    all_data = load_catalog(combined_file,
+                            columns=('longitude', 'latitude', 'magnitude',
+                                     'method', 'is_synthetic'))
     print(f"Loaded {len(all_data)} events from combined dataset")
     
     # Get high-magnitude template events (>= 5.0)
@@ -30,69 +36,61 @@ def generate_simple_synthetics():
     
     # Create synthetic events
     n_synthetic = 10
-    synthetic_events = []
-    
-    for i in range(n_synthetic):
-        # Sample a random template event
-        template = templates.sample(1).iloc[0]
-        
-        # Generate magnitude (6.5-7.3 range)
-        magnitude = random.uniform(6.5, 7.3)
-        
-        # Jitter location slightly but stay in the Marmara region
-        # Add random noise (±0.3 degrees, about 30km)
-        longitude = template['longitude'] + random.uniform(-0.3, 0.3)
-        latitude = template['latitude'] + random.uniform(-0.2, 0.2)
-        
-        # Ensure we stay in the Marmara region
-        longitude = max(26.0, min(30.5, longitude))
-        latitude = max(39.5, min(41.5, latitude))
-        
-        # Generate depth (typical seismogenic depth range)
-        depth = random.uniform(5, 20)
-        
-        # Create synthetic event
-        synthetic = {
-            'id': f"SYN_SIMPLE_{i+1:03d}",
-            'longitude': longitude,
-            'latitude': latitude,
-            'depth_km': depth,
-            'magnitude': magnitude,
-            'is_synthetic': 1,
-            'sample_weight': 0.2,
-            'method': 'simple'
-        }
-        
-        # Assign random timestamp between 2003-2025
-        year = random.randint(2003, 2025)
-        month = random.randint(1, 12)
-        day = random.randint(1, 28)
-        hour = random.randint(0, 23)
-        minute = random.randint(0, 59)
-        second = random.randint(0, 59)
-        
-        timestamp = f"{year}-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:{second:02d}"
-        synthetic['time'] = timestamp
-        
-        # Calculate rupture dimensions (approximate)
-        # Log(A) = M - 4.0
-        area = 10 ** (magnitude - 4.0)
-        length = np.sqrt(area * 2)  # Using 2:1 aspect ratio
-        width = length / 2
-        
-        synthetic['rupture_length_km'] = length
-        synthetic['rupture_width_km'] = width
-        synthetic['rupture_area_km2'] = area
-        
-        synthetic_events.append(synthetic)
-        print(f"Created synthetic event {i+1}/{n_synthetic} with M{magnitude:.1f}")
-    
-    # Create DataFrame
-    synthetics_df = pd.DataFrame(synthetic_events)
-    
-    # Save synthetic events
-    output_file = os.path.join(processed_data_path, "synthetic_simple_v1.csv")
-    synthetics_df.to_csv(output_file, index=False)
+
+    # One generator for the whole run: every per-event random quantity is
+    # drawn as a batch up front, amortizing the RNG call overhead over all
+    # events instead of paying it one scalar at a time inside the loop
+    rng = np.random.default_rng()
+    magnitudes = rng.uniform(6.5, 7.3, n_synthetic)
+    depths = rng.uniform(5, 20, n_synthetic)
+    # Random timestamps drawn uniformly over the 2003-2025 window as one
+    # batch of epoch nanoseconds, converted by a single pd.to_datetime call
+    # (no per-event component draws or string assembly/reparsing)
+    start_ns = pd.Timestamp('2003-01-01').value
+    end_ns = pd.Timestamp('2026-01-01').value
+    times = pd.to_datetime(rng.integers(start_ns, end_ns, n_synthetic))
+
+    # Sample all templates in one draw (with replacement) instead of one
+    # templates.sample(1).iloc[0] round-trip per event
+    chosen = templates.sample(n_synthetic, replace=True).reset_index(drop=True)
+
+    # Jitter locations slightly (±0.3 degrees, about 30km) and clip back
+    # to the Marmara region in one pass over the coordinate arrays
+    longitudes = np.clip(
+        chosen['longitude'].to_numpy() + rng.uniform(-0.3, 0.3, n_synthetic),
+        26.0, 30.5)
+    latitudes = np.clip(
+        chosen['latitude'].to_numpy() + rng.uniform(-0.2, 0.2, n_synthetic),
+        39.5, 41.5)
+
+    # Rupture dimensions (approximate): Log(A) = M - 4.0 with a 2:1 aspect
+    # ratio, computed for the whole batch at once
+    areas = 10 ** (magnitudes - 4.0)
+    lengths = np.sqrt(areas * 2)
+    widths = lengths / 2
+
+    # Build the DataFrame from column arrays in one shot
+    synthetics_df = pd.DataFrame({
+        'id': 'SYN_SIMPLE_' + pd.Series(np.arange(1, n_synthetic + 1)).astype(str).str.zfill(3),
+        'longitude': longitudes,
+        'latitude': latitudes,
+        'depth_km': depths,
+        'magnitude': magnitudes,
+        'is_synthetic': 1,
+        'sample_weight': 0.2,
+        'method': 'simple',
+        'time': times,
+        'rupture_length_km': lengths,
+        'rupture_width_km': widths,
+        'rupture_area_km2': areas,
+    })
+    print(f"Created {n_synthetic} synthetic events "
+          f"(M{magnitudes.min():.1f}-{magnitudes.max():.1f})")
+
+    # Save synthetic events (Parquet: typed columns for the downstream
+    # scripts and much faster to write/read than CSV)
+    output_file = os.path.join(PROCESSED_DIR, "synthetic_simple_v1.parquet")
+    synthetics_df.to_parquet(output_file, engine='pyarrow', index=False)
     print(f"Generated {len(synthetics_df)} simple synthetic events")
     print(f"Simple synthetic data saved to {output_file}")
     
@@ -103,7 +101,7 @@ def generate_simple_synthetics():
     real_data = all_data[all_data['is_synthetic'] == 0]
     plt.scatter(real_data['longitude'], real_data['latitude'],
                s=real_data['magnitude']**1.5, alpha=0.3, c='blue',
-               label=f"Real Events ({len(real_data)})")
+               rasterized=True, label=f"Real Events ({len(real_data)})")
     
     # Plot existing synthetics
     bootstrap_data = all_data[all_data['method'] == 'bootstrap']
@@ -112,17 +110,17 @@ def generate_simple_synthetics():
     if not bootstrap_data.empty:
         plt.scatter(bootstrap_data['longitude'], bootstrap_data['latitude'],
                    s=bootstrap_data['magnitude']**1.5, alpha=0.4, c='green',
-                   label=f"Bootstrap ({len(bootstrap_data)})")
+                   rasterized=True, label=f"Bootstrap ({len(bootstrap_data)})")
     
     if not physics_data.empty:
         plt.scatter(physics_data['longitude'], physics_data['latitude'],
                    s=physics_data['magnitude']**1.5, alpha=0.4, c='red',
-                   label=f"Physics ({len(physics_data)})")
+                   rasterized=True, label=f"Physics ({len(physics_data)})")
     
     # Plot simple synthetics
     plt.scatter(synthetics_df['longitude'], synthetics_df['latitude'],
                s=synthetics_df['magnitude']**2, alpha=0.9, c='purple',
-               marker='d', label=f"Simple ({len(synthetics_df)})")
+               marker='d', rasterized=True, label=f"Simple ({len(synthetics_df)})")
     
     # Add labels and legend
     plt.xlabel('Longitude (E)')
@@ -136,7 +134,7 @@ def generate_simple_synthetics():
     plt.ylim(39.5, 41.5)
     
     # Save plot
-    plot_file = os.path.join(outputs_path, "simple_synthetics.png")
+    plot_file = os.path.join(OUTPUTS_DIR, "simple_synthetics.png")
     plt.savefig(plot_file, dpi=300)
     plt.close()
     print(f"Simple synthetics visualization saved to {plot_file}")